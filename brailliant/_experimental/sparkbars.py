@@ -81,17 +81,20 @@ def get_sparkbar(
         if min_width is not None:
             num_chars = max(num_chars, min_width)
 
-    chars = []
-    for i in range(num_chars):
-        char = 0
-        for j, length in enumerate(rows_lengths):
-            if length > i:
-                char |= coords_braille_mapping[0, j]
-            if length > i + 1:
-                char |= coords_braille_mapping[1, j]
-        chars.append(char)
-
-    return "".join(braille_table_str[c] for c in chars)  # todo - fix this function
+    # Each bar covers the first `length` columns of dots in its row, so the row is made of
+    # characters with both dots set, then possibly one with only the left dot set. The
+    # rows are built a whole bar at a time and combined with a single OR each
+    cells = 0
+    for j, length in enumerate(rows_lengths):
+        both = max(0, min(num_chars, length - 1))
+        left_only = max(0, min(num_chars, length)) - both
+        left_dot = coords_braille_mapping[0, j]
+        both_dots = left_dot | coords_braille_mapping[1, j]
+        row = bytes((both_dots,)) * both + bytes((left_dot,)) * left_only
+        cells |= int.from_bytes(row.ljust(num_chars, b"\0"), "big")
+    chars = cells.to_bytes(max(num_chars, 0), "big")
+
+    return chars.decode("latin-1").translate(braille_table_str)  # todo - fix this function
 
 
 def get_sparkbar_normalized(
@@ -28,43 +28,9 @@ CHAR_WIDTH: Final[int] = BRAILLE_COLS
 # Where the bits are:
 #  0b01234567
 
-# def _reorder_bits(b: int, indices: Iterable[int]) -> int:
-#     """Reorder the bits of a byte according to the given indices."""
-#     result = 0
-#     for i, index in enumerate(indices):
-#         result |= ((b >> index) & 1) << i
-#     return result
-#
-#
-# def _get_translation_table() -> bytes:
-#     translation_table = bytes.maketrans(
-#         bytes(_reorder_bits(i, reversed((0, 3, 1, 4, 2, 5, 6, 7))) for i in range(256)),
-#         bytes(range(256)),
-#     )
-#     return translation_table
-
-
-#   We don't need to calculate it every time, so instead of doing
-#     braille_offset_table = _get_translation_table()
-#   we can just do:
-# braille_table = (
-#     b"\x00\x80@\xc0 \xa0`\xe0\x04\x84D\xc4$\xa4d\xe4\x10\x90P\xd00\xb0p\xf0\x14\x94"
-#     b'T\xd44\xb4t\xf4\x02\x82B\xc2"\xa2b\xe2\x06\x86F\xc6&\xa6f\xe6\x12\x92R\xd22'
-#     b"\xb2r\xf2\x16\x96V\xd66\xb6v\xf6\x08\x88H\xc8(\xa8h\xe8\x0c\x8cL\xcc,\xacl"
-#     b"\xec\x18\x98X\xd88\xb8x\xf8\x1c\x9c\\\xdc<\xbc|\xfc\n\x8aJ\xca*\xaaj\xea\x0e"
-#     b"\x8eN\xce.\xaen\xee\x1a\x9aZ\xda:\xbaz\xfa\x1e\x9e^\xde>\xbe~\xfe\x01\x81A"
-#     b"\xc1!\xa1a\xe1\x05\x85E\xc5%\xa5e\xe5\x11\x91Q\xd11\xb1q\xf1\x15\x95U\xd55"
-#     b"\xb5u\xf5\x03\x83C\xc3#\xa3c\xe3\x07\x87G\xc7'\xa7g\xe7\x13\x93S\xd33\xb3s"
-#     b"\xf3\x17\x97W\xd77\xb7w\xf7\t\x89I\xc9)\xa9i\xe9\r\x8dM\xcd-\xadm\xed\x19"
-#     b"\x99Y\xd99\xb9y\xf9\x1d\x9d]\xdd=\xbd}\xfd\x0b\x8bK\xcb+\xabk\xeb\x0f\x8fO"
-#     b"\xcf/\xafo\xef\x1b\x9b[\xdb;\xbb{\xfb\x1f\x9f_\xdf?\xbf\x7f\xff"
-# )
-
-# We can create a string translation table from the bytes translation table:
-#     braille_table_str = str.maketrans(
-#         {b: chr(bytes((b,)).translate(braille_table)[0] | 0x2800) for b in range(256)}
-#     )
-# Again, we don't need to calculate it every time, so we'll just do:
+# Indexing this table with a byte of dots in the desired order gives the braille character
+# with those dots. It only depends on the two layouts above, so it's written out in full
+# rather than computed on import:
 
 braille_table_str = str.maketrans(
     {
@@ -90,6 +56,106 @@ braille_table_str = str.maketrans(
     }
 )
 
+# The same characters UTF-8 encoded, for writing braille straight to binary streams
+braille_table_utf8 = tuple(braille_table_str[i].encode() for i in range(256))
+
+# Every braille character takes 3 bytes in UTF-8, and they all start with 0xE2. The other
+# two bytes of each character can then be looked up with bytes.translate, one table each
+braille_utf8_second_bytes = bytes(braille_table_utf8[i][1] for i in range(256))
+braille_utf8_third_bytes = bytes(braille_table_utf8[i][2] for i in range(256))
+
+
+def braille_bytes_to_utf8(cells: bytes) -> bytearray:
+    """Encodes bytes indexing the braille tables (see `braille_table_str`) as UTF-8.
+
+    Args:
+        cells: The index of each braille character.
+
+    Returns:
+        The UTF-8 encoded braille characters.
+
+    Examples:
+        >>> braille_bytes_to_utf8(bytes([0, 3, 255])).decode()
+        '⠀⣀⣿'
+    """
+    utf8 = bytearray(b"\xe2") * (3 * len(cells))
+    utf8[1::3] = cells.translate(braille_utf8_second_bytes)
+    utf8[2::3] = cells.translate(braille_utf8_third_bytes)
+    return utf8
+
+
+# Each byte of a row of packed pixels covers 2 dots of 4 consecutive braille characters.
+# For each character (by position within the byte) and each row of dots, this maps a byte
+# to its 2 dots placed where they belong in the index of the braille character
+_PACKED_DOTS_TABLES = tuple(
+    tuple(
+        bytes((b >> (6 - BRAILLE_COLS * char)) % 4 << (6 - BRAILLE_COLS * row) for b in range(256))
+        for row in range(BRAILLE_ROWS)
+    )
+    for char in range(4)
+)
+
+
+def pack_braille_cells(data: bytes, width: int, height: int) -> bytes:
+    """Packs 1-bit pixels into bytes indexing the braille tables (see `braille_table_str`).
+
+    The pixels are packed 8 per byte, most significant bit first, with each row padded to
+    a whole number of bytes - the layout of Pillow's "1" mode images and of ffmpeg's "monob"
+    pixel format. The dots of all characters are gathered with lookup tables over whole
+    rows, rather than with Python code running for each character.
+
+    Args:
+        data: The packed pixels, row by row from the top.
+        width: The width of the pixels, in dots.
+        height: The height of the pixels, in dots.
+
+    Returns:
+        The index of each braille character, row by row from the top. Dots past the pixels
+        are left empty.
+
+    Examples:
+        >>> pack_braille_cells(bytes([0b10100000, 0b01000000]), 3, 2).hex()
+        '9080'
+    """
+    row_size = (width + 7) // 8
+    width_chars = (width + BRAILLE_COLS - 1) // BRAILLE_COLS
+    height_chars = (height + BRAILLE_ROWS - 1) // BRAILLE_ROWS
+    block_size = row_size * BRAILLE_ROWS
+    data = bytes(data[: row_size * height]).ljust(block_size * height_chars, b"\0")
+    if width % 8:
+        # Clear the bits padding each row, so that they can't show up as dots
+        last_byte = (0xFF << (8 - width % 8)) & 0xFF
+        mask = (b"\xff" * (row_size - 1) + bytes((last_byte,))) * (len(data) // row_size)
+        data = (int.from_bytes(data, "big") & int.from_bytes(mask, "big")).to_bytes(
+            len(data), "big"
+        )
+
+    # The bytes of each row of dots of the characters, for all rows of characters
+    dot_rows = [
+        b"".join(
+            data[start + row * row_size : start + (row + 1) * row_size]
+            for start in range(0, len(data), block_size)
+        )
+        for row in range(BRAILLE_ROWS)
+    ]
+
+    # The dots from all rows are in separate bits, so they can be combined with one big OR
+    size = len(dot_rows[0])
+    cells = bytearray(4 * size)
+    for char, tables in enumerate(_PACKED_DOTS_TABLES):
+        packed = 0
+        for dot_row, table in zip(dot_rows, tables):
+            packed |= int.from_bytes(dot_row.translate(table), "big")
+        cells[char::4] = packed.to_bytes(size, "big")
+
+    if width_chars == 4 * row_size:
+        return bytes(cells)
+    # Characters made up only of row padding are dropped
+    return b"".join(
+        cells[start : start + width_chars] for start in range(0, len(cells), 4 * row_size)
+    )
+
+
 # Mapping of (x, y) coordinates to braille character dots represented as a bit mask.
 # The resulting integer of one of these values or an OR of multiple of them will result
 # in the index of the braille character in the braille_table_str table.
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from itertools import chain, count, takewhile
+from itertools import chain
 import math
 import operator
 from enum import Enum
@@ -8,6 +8,7 @@ from fractions import Fraction
 from functools import partialmethod
 from pathlib import Path
 from typing import (
+    BinaryIO,
     Callable,
     Iterable,
     Iterator,
@@ -20,7 +21,7 @@ from typing import (
 
 from bitarray import bitarray
 
-from brailliant import BRAILLE_COLS, BRAILLE_ROWS, braille_table_bitarray
+from brailliant import BRAILLE_COLS, BRAILLE_ROWS, braille_bytes_to_utf8, pack_braille_cells
 
 if TYPE_CHECKING:
     try:
@@ -31,6 +32,10 @@ if TYPE_CHECKING:
         ImageFont = "ImageFont"
 
 
+# Moves the cursor one line down and back to the first column, without scrolling
+_CONTROL_CHARS_SEP = "\x1b[1B\r"
+
+
 class DrawMode(str, Enum):
     """The mode to draw in."""
 
@@ -194,13 +199,15 @@ def _draw_arc(
         if angle_step is None:
             angle_step = 2
         angle_step = math.radians(angle_step)
-        for angle in takewhile(
-            lambda a: a <= end_angle,
-            count(start_angle, angle_step),
-        ):
-            x_offset = round(math.cos(angle) * radius)
-            y_offset = round(math.sin(angle) * radius)
-            yield x + x_offset, y + y_offset
+        steps = max(0, math.floor((end_angle - start_angle) / angle_step) + 1)
+
+        # Rotate a unit vector by angle_step at each point rather than calling cos and sin
+        # for every angle
+        cos, sin = math.cos(start_angle), math.sin(start_angle)
+        cos_step, sin_step = math.cos(angle_step), math.sin(angle_step)
+        for _ in range(steps):
+            yield x + round(cos * radius), y + round(sin * radius)
+            cos, sin = cos * cos_step - sin * sin_step, sin * cos_step + cos * sin_step
 
 
 class _LineDefinition(NamedTuple):
@@ -371,14 +378,51 @@ class CanvasText:
         return f"CanvasText({self.text!r}, {self.x}, {self.y})"
 
 
-def get_char(grid: bitarray, x: int, y: int, w: int) -> bitarray:
-    """Get a single braille character from a grid of characters."""
-    char = bitarray(8)
-    for i in range(4):
-        start = (y * 4 + i) * w + x * 2
-        end = start + 2
-        char[2 * i : 2 * i + 2] = grid[start:end]
-    return char
+def _unpack_rows(data: bytes, width: int, canvas_width: int, canvas_height: int) -> bitarray:
+    """Returns 1-bit pixels as the contents of a canvas of the given size, row by row.
+
+    The pixels are packed 8 per byte, most significant bit first, and each row is padded to
+    a whole number of bytes - the layout of Pillow's "1" mode and ffmpeg's "monob" pixel
+    format, and of a big endian bitarray. Any dots past the pixels are left empty.
+    """
+    packed = bitarray(endian="big")
+    packed.frombytes(data)
+
+    row_bits = (width + 7) // 8 * 8
+    if row_bits == width == canvas_width:
+        bits = packed
+    else:
+        padding = bitarray(canvas_width - width, endian="big")
+        padding.setall(0)
+        bits = bitarray(endian="big")
+        for start in range(0, len(packed), row_bits):
+            bits += packed[start : start + width]
+            bits += padding
+
+    missing = canvas_width * canvas_height - len(bits)
+    if missing > 0:
+        bits += bitarray(missing, endian="big")
+        bits[-missing:] = 0
+    return bits
+
+
+def _apply_add(grid: bitarray, coords: Iterable[Tuple[int, int]], width: int, height: int) -> None:
+    """Sets the dots at the given coordinates, ignoring the ones outside the grid."""
+    max_x, max_y = width - 1, height - 1
+    for x, y in coords:
+        # Any negative term sets the sign bit, so this is a single bounds check
+        if (x | y | (max_x - x) | (max_y - y)) >= 0:
+            grid[(max_y - y) * width + x] = 1
+
+
+def _apply_clear(
+    grid: bitarray, coords: Iterable[Tuple[int, int]], width: int, height: int
+) -> None:
+    """Clears the dots at the given coordinates, ignoring the ones outside the grid."""
+    max_x, max_y = width - 1, height - 1
+    for x, y in coords:
+        if (x | y | (max_x - x) | (max_y - y)) >= 0:
+            grid[(max_y - y) * width + x] = 0
 
 
 class Canvas:
@@ -412,6 +456,57 @@ class Canvas:
         """
         return cls(width * BRAILLE_COLS, height * BRAILLE_ROWS)
 
+    @classmethod
+    def from_image(cls, image: "Image", dither: bool = True) -> Canvas:
+        """Returns a new canvas the size of the image, with dots set for its light pixels.
+
+        Unlike `draw_image`, the pixels are loaded straight into the canvas rather than
+        composited over it, and any dots left over by rounding the size up to whole
+        characters are empty.
+
+        Args:
+            image: The PIL image to load. Images in "1" mode are used as they are, and
+                other images are converted to it.
+            dither: Whether to dither the image when converting it to "1" mode.
+
+        Returns:
+            A new canvas with the image's pixels.
+        """
+        try:
+            from PIL.Image import Dither
+        except ImportError as e:
+            raise ImportError(
+                "ImportError while trying to import Pillow."
+                "\nImage loading requires the Pillow library to be installed:"
+                "\n    pip install Pillow"
+            ) from e
+
+        if image.mode != "1":
+            image = image.convert("1", dither=Dither.FLOYDSTEINBERG if dither else Dither.NONE)
+
+        return cls.from_bytes(image.tobytes(), image.width, image.height)
+
+    @classmethod
+    def from_bytes(cls, data: bytes, width: int, height: int) -> Canvas:
+        """Returns a new canvas with dots set for the set bits of packed 1-bit pixels.
+
+        The pixels are packed 8 per byte, most significant bit first, with each row padded
+        to a whole number of bytes. That's the layout of Pillow's "1" mode images and of
+        ffmpeg's "monob" pixel format, so raw frames can be loaded without Pillow.
+
+        Args:
+            data: The packed pixels, row by row from the top.
+            width: The width of the pixels, in dots.
+            height: The height of the pixels, in dots.
+
+        Returns:
+            A new canvas with the pixels, where any dots left over by rounding the size up
+            to whole characters are empty.
+        """
+        canvas = cls(width, height)
+        canvas._canvas = _unpack_rows(data, width, canvas.width, canvas.height)
+        return canvas
+
     def set_cell(self, x: int, y: int) -> Canvas:
         """Sets the cell at the given coordinates to be filled."""
         self._canvas[(self.height - y - 1) * self.width + x] = 1
@@ -442,15 +537,37 @@ class Canvas:
         self._canvas.setall(1)
         return self
 
-    def get_str(self) -> str:
-        lines = []
-        for y in range(self.height_chars):
-            line = bitarray()
-            for x in range(self.width_chars):
-                char = get_char(self._canvas, x, y, self.width)
-                line.extend(char)
+    def _get_cell_bytes(self) -> bytes:
+        """Returns the canvas packed as one byte per braille character, row by row.
 
-            lines.append(b"".join(line.decode(braille_table_bitarray)).decode("utf-8"))
+        Each byte is the index of the character in the braille tables (see
+        `braille_table_str`). The canvas is packed with `pack_braille_cells`, so there's no
+        Python work per character.
+        """
+        grid = self._canvas
+        w = self.width
+        if w % 8:
+            # pack_braille_cells expects every row to start on a whole byte, as in packed
+            # pixels, while rows of the canvas follow each other directly
+            row_bits = (w + 7) // 8 * 8
+            padded = bitarray(row_bits * self.height, endian="big")
+            padded.setall(0)
+            for src, dst in zip(range(0, len(grid), w), range(0, len(padded), row_bits)):
+                padded[dst : dst + w] = grid[src : src + w]
+            grid = padded
+        return pack_braille_cells(grid.tobytes(), w, self.height)
+
+    def get_str(self, *, sep: str = "\n") -> str:
+        """Returns the canvas as a string, with rows joined by `sep`."""
+        return sep.join(self.get_rows())
+
+    def get_rows(self) -> list[str]:
+        """Returns the rows of the canvas as strings, from top to bottom, with any text
+        drawn over them."""
+        # Encode all characters at once, then split the result into rows
+        chars = braille_bytes_to_utf8(self._get_cell_bytes()).decode()
+        w = self.width_chars
+        lines = [chars[i : i + w] for i in range(0, len(chars), w)]
 
         # Add text
         text_lines = chain.from_iterable(txt.in_split_lines() for txt in self._text)
@@ -482,7 +599,39 @@ class Canvas:
             txt_end = char_x + char_length
             lines[char_y] = "".join((lines[char_y][:txt_start], txt, lines[char_y][txt_end:]))
 
-        return "\n".join(lines)
+        return lines
+
+    def get_str_control_chars(self) -> str:
+        """Returns the canvas as a string with rows separated by "cursor down" and carriage
+        return control sequences rather than newlines.
+
+        Unlike newlines, these never scroll the terminal, so the result can be written
+        repeatedly from a saved cursor position to animate the canvas in place.
+        """
+        return self.get_str(sep=_CONTROL_CHARS_SEP)
+
+    def write_to(self, stream: BinaryIO) -> None:
+        """Writes the canvas to a binary stream (e.g. `sys.stdout.buffer`) as UTF-8 encoded
+        braille, with rows separated as in `get_str_control_chars`.
+
+        The characters are encoded straight from the canvas, so no intermediate string is
+        built and encoded on every frame. Flushing the stream is left to the caller.
+        """
+        stream.write(_CONTROL_CHARS_SEP.encode().join(self.get_rows_utf8()))
+
+    def get_rows_utf8(self) -> list[bytes]:
+        """Returns the rows of the canvas as UTF-8 encoded braille, from top to bottom.
+
+        All characters are encoded into one buffer which the rows are then sliced from, so
+        no intermediate string is built, joined and encoded again.
+        """
+        if self._text:
+            # Text overlays are only handled by get_rows
+            return [row.encode() for row in self.get_rows()]
+
+        utf8 = bytes(braille_bytes_to_utf8(self._get_cell_bytes()))
+        row_size = 3 * self.width_chars
+        return [utf8[i : i + row_size] for i in range(0, len(utf8), row_size)]
 
     def write_text(
         self,
@@ -501,14 +650,12 @@ class Canvas:
         mode: DrawMode = DrawMode.ADD,
     ) -> Canvas:
         """Modify the canvas by setting or clearing the dots on the coordinates given by coords."""
-        if mode not in ("add", "clear"):
+        if mode == "add":
+            _apply_add(self._canvas, coords, self.width, self.height)
+        elif mode == "clear":
+            _apply_clear(self._canvas, coords, self.width, self.height)
+        else:
             raise ValueError(f"Invalid mode {mode}")
-
-        val = 1 if mode == "add" else 0
-        w, h = self.width, self.height
-        for x, y in coords:
-            if 0 <= x < w and 0 <= y < h:
-                self._canvas[(h - y - 1) * w + x] = val
         return self
 
     def draw_line(
@@ -780,9 +927,7 @@ class Canvas:
         final_img.paste(image, (x, y))
         final_img = final_img.convert("1", dither=Dither.FLOYDSTEINBERG if dither else Dither.NONE)
 
-        final_img.save("final_img.png")
-
-        im_bitarray = bitarray((1 if px else 0 for px in final_img.getdata(0)))
+        im_bitarray = _unpack_rows(final_img.tobytes(), final_img.width, *final_img.size)
         if mode == "clear":
             im_bitarray = ~im_bitarray
             self._canvas &= im_bitarray
@@ -2,24 +2,33 @@ import argparse
 import asyncio
 import math
 import mimetypes
+import os
 import shutil
 import signal
 import sys
 import textwrap
-from concurrent.futures import ProcessPoolExecutor
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from functools import partial
 from pathlib import Path
+from typing import BinaryIO, Callable
 
 from asynkets import PeriodicPulse, async_getch
 
 from brailliant import sparkline, Canvas
 from brailliant.base import BRAILLE_COLS, BRAILLE_ROWS
 from brailliant.cli_utils import (
+    changed_rows,
     create_ffmpeg_process,
     extract_frames_from_video,
+    FrameRing,
     image_to_braille,
     InvalidVideoError,
+    packed_pixels_to_braille,
     setup_terminal,
+    TimerFdPulse,
+    write_all,
 )
 
 try:
@@ -115,6 +124,27 @@ def display_braille_media() -> None:
         default=False,
         help="Invert the image's colors in black/white mode, or the outlining in color mode.",
     )
+    parser.add_argument(
+        "-d",
+        "--dither",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Dither images in black/white mode, rather than thresholding them (faster).",
+    )
+    parser.add_argument(
+        "-o",
+        "--ordered-dither",
+        action=argparse.BooleanOptionalAction,
+        default=False,
+        help="Dither with an ordered pattern in black/white mode (faster, less flicker in videos).",
+    )
+    parser.add_argument(
+        "-p",
+        "--palette",
+        action=argparse.BooleanOptionalAction,
+        default=False,
+        help="Use the 256 color palette in color mode, for much less output (e.g. over SSH).",
+    )
     parser.add_argument(
         "-r",
         "--fps",
@@ -177,6 +207,9 @@ def display_braille_media() -> None:
             verbose=args.verbose,
             keep_ratio=args.keep_ratio,
             invert=args.invert,
+            dither=args.dither,
+            palette=args.palette,
+            ordered_dither=args.ordered_dither,
         )
     elif media_type == "video":
         if not shutil.which("ffmpeg"):
@@ -191,6 +224,9 @@ def display_braille_media() -> None:
             keep_ratio=args.keep_ratio,
             fps=args.fps,
             invert=args.invert,
+            dither=args.dither,
+            palette=args.palette,
+            ordered_dither=args.ordered_dither,
         )
         try:
             asyncio.run(coro)
@@ -216,6 +252,9 @@ def display_image(
     verbose: bool,
     keep_ratio: bool,
     invert: bool,
+    dither: bool = True,
+    palette: bool = False,
+    ordered_dither: bool = False,
 ) -> None:
     log = partial(print, file=sys.stderr) if verbose else lambda message: None
 
@@ -228,6 +267,9 @@ def display_image(
         keep_ratio=keep_ratio,
         color=color,
         invert=invert,
+        dither=dither,
+        palette=palette,
+        ordered_dither=ordered_dither,
     )
     height = result_text.count("\n")
     setup_terminal(height + 1)
@@ -248,41 +290,92 @@ def display_font_text(
     print(canvas, end="")
 
 
+# State lines shown below video frames, already encoded so that each frame only needs
+# the time formatted in
+# todo - make this prettier with color, braille, and total duration
+# todo (maybe) - handle reversing, make a progress bar, etc.
+_PLAYING_STATE = "\n[ PLAYING ⏵   %02.0f:%02.0f:%06.3f ]\033[u".encode()
+_PAUSED_STATE = "\n[  PAUSED ⏸   %02.0f:%02.0f:%06.3f ]\033[u".encode()
+
+
+def _frame_to_rows(**kwargs) -> list[bytes]:
+    """Convert a video frame to rows of encoded braille, ready to be written to the terminal."""
+    return image_to_braille(**kwargs).encode().strip().split(b"\n")
+
+
+def _monochrome_frame_to_rows(frame: bytes, width: int, height: int, invert: bool) -> list[bytes]:
+    """Convert a 1-bit video frame to rows of encoded braille, ready to be written to the
+    terminal.
+
+    The frame's packed pixels are turned into braille characters in one go, without being
+    unpacked into a canvas and gathered back into characters.
+    """
+    utf8 = bytes(packed_pixels_to_braille(frame, width, height, invert))
+    row_size = 3 * math.ceil(width / BRAILLE_COLS)
+    return [utf8[i : i + row_size] for i in range(0, len(utf8), row_size)]
+
+
+# How many threads convert frames. More than a few of them doesn't make for faster
+# playback, as a terminal can only show so many frames, but each one holds frames in memory.
+_WORKERS = min(os.cpu_count() or 1, 8)
+
+# How many frames are converted together by each task submitted to the executor
+_FRAMES_PER_BATCH = 4
+
+
+def _convert_batch(conversions: list[Callable[[], list[bytes]]]) -> list[list[bytes]]:
+    """Convert a batch of frames, given the functions which convert each of them."""
+    return [convert() for convert in conversions]
+
+
 async def _show_frames(
     fps: float,
-    frame_queue: asyncio.Queue,
+    frame_queue: FrameRing,
     playing_event: asyncio.Event,
+    redraw_changed_rows: bool = True,
 ) -> None:
-    """Show frames from the frame queue to the terminal at the specified framerate."""
+    """Show frames from the frame queue to the terminal at the specified framerate.
+
+    Only the rows which changed since the previous frame are redrawn if
+    `redraw_changed_rows` is True. That relies on the frame staying in place below the
+    saved cursor position, so otherwise (e.g. when the frame and state line don't fit in
+    the terminal and scroll it) every frame is drawn in full.
+    """
     frame_delta = 1 / fps
     current_frame = 0
-    periodic_pulse = PeriodicPulse(frame_delta)
+    # A timerfd keeps much closer to the frame rate than sleeping, where it's available
+    if TimerFdPulse.is_supported():
+        periodic_pulse = TimerFdPulse(frame_delta)
+    else:
+        periodic_pulse = PeriodicPulse(frame_delta)
+    # Frames go straight to the file descriptor, skipping the buffered writer's copy and
+    # lock, and each frame is written together with its state line in a single call
+    stdout_fd = sys.stdout.fileno()
+    sys.stdout.flush()
+    previous_rows = []
     try:
         while True:
-            new_frame_fut = await frame_queue.get()
+            new_batch_fut = await frame_queue.get()
 
-            if new_frame_fut is None:
+            if new_batch_fut is None:
                 break
 
-            new_frame = await new_frame_fut
-            current_frame += 1
+            for rows in await new_batch_fut:
+                current_frame += 1
 
-            await periodic_pulse
-            crt_time = current_frame * frame_delta
-            h, m, s = crt_time // 3600, crt_time // 60 % 60, crt_time % 60
+                await periodic_pulse
+                crt_time = current_frame * frame_delta
+                h, m, s = crt_time // 3600, crt_time // 60 % 60, crt_time % 60
 
-            if playing_event.is_set():
-                # todo - make this prettier with color, braille, and total duration
-                # todo (maybe) - handle reversing, make a progress bar, etc.
-                state = f"[ PLAYING ⏵   {h:02.0f}:{m:02.0f}:{s:06.3f} ]"
-            else:
-                state = f"[  PAUSED ⏸   {h:02.0f}:{m:02.0f}:{s:06.3f} ]"
-            new_frame: str
-            sys.stdout.buffer.write(new_frame.encode().strip() + f"\n{state}\033[u".encode())
-            sys.stdout.buffer.flush()
-            frame_queue.task_done()
+                state = _PLAYING_STATE if playing_event.is_set() else _PAUSED_STATE
+                rows: list[bytes]
+                output = changed_rows(rows, previous_rows)
+                output.append(state % (h, m, s))
+                write_all(stdout_fd, output)
+                if redraw_changed_rows:
+                    previous_rows = rows
 
-            await playing_event.wait()
+                await playing_event.wait()
 
     except asyncio.CancelledError:
         pass
@@ -292,41 +385,65 @@ async def _show_frames(
 
 async def process_frames(
     proc: asyncio.subprocess.Process,
+    frames_pipe: BinaryIO,
     width: int,
     height: int,
     color: bool,
     invert: bool,
-    frame_queue: asyncio.Queue,
+    frame_queue: FrameRing,
+    pix_fmt: str,
+    palette: bool = False,
 ) -> None:
-    """Process frames from the ffmpeg process and put them on the frame queue."""
+    """Process frames from the ffmpeg process and put them on the frame queue.
+
+    Frames are read in the pixel format returned by `create_ffmpeg_process`. Monochrome
+    frames are 1-bit "monob" frames, which are packed into braille without going through
+    PIL.
+    """
 
     loop = asyncio.get_running_loop()
-    process_pool = ProcessPoolExecutor()
+    # Threads get frames without pickling them, and most of the conversion work is done
+    # by Pillow, which releases the GIL while processing images
+    executor = ThreadPoolExecutor(max_workers=_WORKERS)
+
+    monochrome = pix_fmt == "monob"
+    frames = extract_frames_from_video(
+        process=proc,
+        frames_pipe=frames_pipe,
+        width=width,
+        height=height,
+        color=color,
+        return_pil_images=not monochrome,
+        pix_fmt=pix_fmt,
+    )
 
     try:
-        async for frame in extract_frames_from_video(
-            process=proc,
-            width=width,
-            height=height,
-            return_pil_images=True,
-        ):
-            fn = partial(
-                image_to_braille,
-                invert=invert,
-                image=frame,
-                color=color,
-            )
-            fut = loop.run_in_executor(process_pool, fn)
+        # Frames are converted in batches, so that the executor and the event loop only
+        # have to hand over work and results once per batch rather than once per frame
+        batch = []
+        async for frame in frames:
+            if not monochrome:
+                fn = partial(
+                    _frame_to_rows, invert=invert, image=frame, color=color, palette=palette
+                )
+            else:
+                fn = partial(_monochrome_frame_to_rows, frame, width, height, invert)
+            batch.append(fn)
+            if len(batch) < _FRAMES_PER_BATCH:
+                continue
 
             # The `await` here prevents the queue from filling up too much -
-            # it will only queue up to `maxsize` frames at a time, and the
+            # it will only hold up to its capacity of batches at a time, and the
             # ffmpeg process won't run off producing frames we're not ready
             # to display yet
-            await frame_queue.put(fut)
+            await frame_queue.put(loop.run_in_executor(executor, _convert_batch, batch))
+            batch = []
 
+        if batch:
+            await frame_queue.put(loop.run_in_executor(executor, _convert_batch, batch))
         await frame_queue.put(None)
     finally:
-        process_pool.shutdown(cancel_futures=True)
+        executor.shutdown(cancel_futures=True)
 
 
 async def capture_keys(playing_event: asyncio.Event) -> None:
@@ -354,6 +471,9 @@ async def display_video(
     keep_ratio: bool,
     fps: float,
     invert: bool,
+    dither: bool = True,
+    palette: bool = False,
+    ordered_dither: bool = False,
 ) -> None:
 
     playing_event = asyncio.Event()
@@ -367,28 +487,33 @@ async def display_video(
     term_size = shutil.get_terminal_size()
     size = size if size else (term_size[0] * BRAILLE_COLS, term_size[1] * BRAILLE_ROWS)
 
-    # Max size here will define the max number of frames queued for processing
-    # at any given time. This is to prevent too many frames from being queued
+    # The capacity here will define the max number of batches of frames queued for
+    # processing at any given time. This is to prevent too many frames from being queued
     # and having to wait for future frames to be processed before a previous
-    # frame is.
-    frame_queue = asyncio.Queue(maxsize=50)
+    # frame is. Two batches per worker keeps every worker busy while the oldest
+    # batch is being shown.
+    frame_queue = FrameRing(capacity=2 * _WORKERS)
 
     loop = asyncio.get_running_loop()
 
-    proc, width, height, fps = await create_ffmpeg_process(
+    proc, frames_pipe, width, height, fps, pix_fmt = await create_ffmpeg_process(
         video_file=file,
         fps=fps,
         width=size[0],
         height=size[1],
         keep_ratio=keep_ratio,
+        monochrome=not color,
+        dither=dither,
+        ordered_dither=ordered_dither,
     )
 
-    setup_terminal(math.ceil(height / BRAILLE_ROWS) + 1)
+    fits_terminal = setup_terminal(math.ceil(height / BRAILLE_ROWS) + 1)
     show_frames_task = asyncio.create_task(
         _show_frames(
             fps=fps,
             frame_queue=frame_queue,
             playing_event=playing_event,
+            redraw_changed_rows=fits_terminal,
         )
     )
     capture_play_pause_keys_task = asyncio.create_task(capture_keys(playing_event=playing_event))
@@ -401,11 +526,14 @@ async def display_video(
     process_frames_task = asyncio.create_task(
         process_frames(
             proc=proc,
+            frames_pipe=frames_pipe,
             width=width,
             height=height,
             color=color,
             invert=invert,
             frame_queue=frame_queue,
+            pix_fmt=pix_fmt,
+            palette=palette,
         )
     )
 
@@ -426,6 +554,13 @@ async def display_video(
     await cancel_tasks_task
 
 
+# The most input read at once by the sparkline
+_SPARKLINE_READ_SIZE = 64 * 1024
+
+# The shortest time between redraws of a sparkline
+_SPARKLINE_REDRAW_INTERVAL = 1 / 60
+
+
 def display_sparkline():
     parser = argparse.ArgumentParser()
     parser.add_argument(
@@ -481,20 +616,58 @@ def display_sparkline():
     args = parser.parse_args()
     title = args.title if args.title is not None else ""
 
-    stdin = sys.stdin.buffer
-    values = []
-    for line in stdin:
-        line = line.decode("utf-8")
-        line = line.rstrip().split()
-        value = [int(val) for val in line]
+    stdin_fd = sys.stdin.fileno()
+    stdout_fd = sys.stdout.fileno()
+    sys.stdout.flush()
+    # Only the values which fit in the sparkline are kept, so the lowest and highest values
+    # seen are tracked separately to keep the same scale as with all of them
+    values = deque(maxlen=2 * args.width)
+    lowest = highest = None
+
+    def add(line: bytes) -> None:
+        nonlocal lowest, highest
+        # int() parses bytes just as well, so lines don't need to be decoded first
+        value = list(map(int, line.split()))
         if len(value) == 1:
             values.append(value[0])
         else:
-            values = value
-        sl = sparkline(values, args.width, args.filled, args.min, args.max)
-        sys.stdout.write(f"\r{title} {sl} ")
-        sys.stdout.flush()
-    sys.stdout.write("\n")
+            values.clear()
+            values.extend(value)
+            lowest = highest = None
+        if value:
+            lowest = min(value) if lowest is None else min(lowest, *value)
+            highest = max(value) if highest is None else max(highest, *value)
+
+    def draw() -> None:
+        min_val = args.min if args.min is not None else lowest
+        max_val = args.max if args.max is not None else highest
+        sl = sparkline(values, args.width, args.filled, min_val, max_val)
+        write_all(stdout_fd, [f"\r{title} {sl} ".encode()])
+
+    # Input is read in chunks of whatever has arrived so far, and the sparkline is drawn at
+    # most once per chunk. Redrawing faster than the terminal refreshes is wasted work, so
+    # chunks arriving sooner than that after the last redraw aren't drawn until a later one
+    partial_line = b""
+    last_draw = 0.0
+    drawn = True
+    while chunk := os.read(stdin_fd, _SPARKLINE_READ_SIZE):
+        *lines, partial_line = (partial_line + chunk).split(b"\n")
+        for line in lines:
+            add(line)
+            drawn = False
+        now = time.monotonic()
+        if not drawn and now - last_draw >= _SPARKLINE_REDRAW_INTERVAL:
+            last_draw = now
+            drawn = True
+            draw()
+
+    if partial_line:
+        # The last line of the input doesn't end with a newline
+        add(partial_line)
+        drawn = False
+    if not drawn:
+        draw()
+    write_all(stdout_fd, [b"\n"])
 
 
 if __name__ == "__main__":
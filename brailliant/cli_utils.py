@@ -1,44 +1,267 @@
 import asyncio
 import atexit
 import math
+import os
 import re
 import sys
+import time
 from asyncio.subprocess import Process
+from collections import deque
+from functools import lru_cache
+from itertools import chain
 from os import get_terminal_size
 from pathlib import Path
-from typing import AsyncIterator
+from typing import Any, AsyncIterator, BinaryIO, Sequence
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
 import PIL
-from PIL import ImageFilter
-from PIL.Image import Dither, Image
+from PIL import ImageChops, ImageFilter
+from PIL.Image import Dither, Image, Resampling
+
+from brailliant import (
+    BRAILLE_COLS,
+    BRAILLE_ROWS,
+    braille_bytes_to_utf8,
+    Canvas,
+    pack_braille_cells,
+)
+
+# Size of the buffers used to read frames from ffmpeg. 1 MiB is the largest pipe size
+# unprivileged processes can ask for by default on Linux (see /proc/sys/fs/pipe-max-size)
+_PIPE_BUFFER_SIZE = 1024 * 1024
+
+# The most buffers os.writev accepts at once
+_IOV_MAX = os.sysconf("SC_IOV_MAX") if hasattr(os, "sysconf") else 16
+
+# Maps grayscale levels to black or white, for thresholding images in a single pass
+_THRESHOLD_LUT = [0] * 128 + [255] * 128
+
+
+def _bayer_matrix(size: int) -> list[list[int]]:
+    """Build the Bayer matrix of the given size (a power of 2) used for ordered dithering."""
+    if size == 1:
+        return [[0]]
+    half = _bayer_matrix(size // 2)
+    top = [[4 * v for v in row] + [4 * v + 2 for v in row] for row in half]
+    bottom = [[4 * v + 3 for v in row] + [4 * v + 1 for v in row] for row in half]
+    return top + bottom
+
+
+# Maps the index of each braille character to the one with every dot flipped
+_INVERTED_CELLS = bytes(range(255, -1, -1))
+
+# Maps grayscale levels other than black to white
+_NONZERO_LUT = [0] + [255] * 255
+
+# Grayscale levels pixels must be above to be white with ordered dithering, for each
+# position in the 8x8 tile of thresholds which is repeated over the image
+_BAYER_THRESHOLDS = [bytes(4 * v + 2 for v in row) for row in _bayer_matrix(8)]
+
+
+# Levels of each channel in the 6x6x6 color cube of the 256 color ANSI palette, which
+# starts at index 16, and lookup tables mapping channel values to the nearest level
+_CUBE_LEVELS = (0, 95, 135, 175, 215, 255)
+_CUBE_LEVEL_INDEX = [
+    min(range(len(_CUBE_LEVELS)), key=lambda i: abs(_CUBE_LEVELS[i] - v)) for v in range(256)
+]
+_CUBE_LEVEL_LUT = [_CUBE_LEVELS[i] for i in _CUBE_LEVEL_INDEX]
+
+# Maps the bands of an RGB image to their share of the index of the closest color in the
+# cube, so that adding them up gives the index (at most 231, so it fits in a byte)
+_CUBE_INDEX_LUT = (
+    [16 + 36 * i for i in _CUBE_LEVEL_INDEX]
+    + [6 * i for i in _CUBE_LEVEL_INDEX]
+    + _CUBE_LEVEL_INDEX
+)
+
+# Darkens each band of an image, for cell backgrounds
+_DARKEN_LUT = [int(v * 0.3) for v in range(256)]
 
-from brailliant import BRAILLE_COLS, BRAILLE_ROWS, Canvas
+# Escape sequences setting the foreground and background colors of a cell
+_TRUECOLOR_SGR = "\033[38;2;%d;%d;%d;48;2;%d;%d;%dm"
+_PALETTE_SGR = "\033[38;5;%d;48;5;%dm"
+
+# Decimal representations of channel values, so that escape sequences can be put together
+# from strings rather than formatting each number
+_DECIMALS = [str(v) for v in range(256)]
+
+
+class _EscapeCodes(dict):
+    """Escape sequences for tuples of colors, formatted from a template the first time each
+    tuple is looked up."""
+
+    def __init__(self, template: str) -> None:
+        super().__init__()
+        self._template = template
+
+    def __missing__(self, colors: tuple[int, ...]) -> str:
+        code = self[colors] = self._template % colors
+        return code
+
+
+# There are few enough palette colors that their escape sequences can all be kept around
+_palette_escape_codes = _EscapeCodes(_PALETTE_SGR)
 
 
 class InvalidVideoError(Exception):
     pass
 
 
+class FrameRing:
+    """A bounded first-in first-out buffer of frames, for one producer and one consumer.
+
+    This does the job of an `asyncio.Queue` with less bookkeeping per frame, as there is
+    no need for unfinished task tracking or for several producers and consumers.
+
+    Args:
+        capacity: The maximum number of frames held at any given time.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self._frames = deque()
+        self._capacity = capacity
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+        self._not_empty = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    async def put(self, frame: Any) -> None:
+        """Add a frame, waiting until there is room for it."""
+        while len(self._frames) >= self._capacity:
+            self._not_full.clear()
+            await self._not_full.wait()
+        self._frames.append(frame)
+        self._not_empty.set()
+
+    async def get(self) -> Any:
+        """Remove and return the oldest frame, waiting until there is one."""
+        while not self._frames:
+            self._not_empty.clear()
+            await self._not_empty.wait()
+        self._not_full.set()
+        return self._frames.popleft()
+
+
+class TimerFdPulse:
+    """Awaitable which resolves on the next tick of a periodic timer, for pacing frames.
+
+    It's used like `asynkets.PeriodicPulse`, but ticks come from a Linux timerfd watched by
+    the event loop rather than from `asyncio.sleep`, which can wake up milliseconds late.
+    Ticks which nothing is waiting for are skipped. Requires Python 3.13 or later on
+    Linux - see `TimerFdPulse.is_supported`.
+
+    Args:
+        period: The time between ticks, in seconds.
+    """
+
+    def __init__(self, period: float) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._waiter: asyncio.Future | None = None
+        self._fd = os.timerfd_create(time.CLOCK_MONOTONIC, flags=os.TFD_NONBLOCK | os.TFD_CLOEXEC)
+        os.timerfd_settime(self._fd, initial=period, interval=period)
+        self._loop.add_reader(self._fd, self._on_tick)
+
+    @staticmethod
+    def is_supported() -> bool:
+        return hasattr(os, "timerfd_create")
+
+    def _on_tick(self) -> None:
+        try:
+            # Reading resets the count of expirations, so the timer stops being readable
+            os.read(self._fd, 8)
+        except BlockingIOError:
+            return
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    def __await__(self):
+        self._waiter = self._loop.create_future()
+        return self._waiter.__await__()
+
+    def close(self) -> None:
+        self._loop.remove_reader(self._fd)
+        os.close(self._fd)
+
+
 def scroll_up(lines: int) -> None:
     """Scroll up the terminal by the given number of lines."""
-    for i in range(lines):
-        sys.stdout.buffer.write(b"\033M")
-        sys.stdout.flush()
+    sys.stdout.buffer.write(b"\033M" * lines)
+    sys.stdout.flush()
 
 
 def scroll_down(lines: int) -> None:
     """Scroll down the terminal by the given number of lines."""
-    for i in range(lines):
-        sys.stdout.buffer.write(b"\033D")
-        sys.stdout.flush()
+    sys.stdout.buffer.write(b"\033D" * lines)
+    sys.stdout.flush()
+
+
+def write_all(fd: int, buffers: Sequence[bytes]) -> None:
+    """Write the given buffers to a file descriptor, with a single syscall if possible.
+
+    Where os.writev isn't available (e.g. on Windows), the buffers are joined and written
+    with os.write instead.
+
+    Args:
+        fd: The file descriptor to write to.
+        buffers: The buffers to write, in order.
+    """
+    if len(buffers) > _IOV_MAX or not hasattr(os, "writev"):
+        buffers = [b"".join(buffers)]
+    if hasattr(os, "writev"):
+        written = os.writev(fd, buffers)
+    else:
+        written = os.write(fd, buffers[0])
+    if written < sum(map(len, buffers)):
+        # Partial writes are rare for terminals, but can happen with pipes
+        data = memoryview(b"".join(buffers))[written:]
+        while data:
+            data = data[os.write(fd, data) :]
+
+
+def changed_rows(rows: list[bytes], previous_rows: list[bytes]) -> list[bytes]:
+    """Get the output that updates a frame shown on the terminal to the given one.
+
+    Only the rows which differ from the previous frame are rewritten, each after moving the
+    cursor to it from the saved cursor position at the top left of the frame. The cursor is
+    left on the last row, ready for the state line to be written below it.
+    """
+    if len(rows) != len(previous_rows):
+        return [b"\n".join(rows)]
+
+    output = []
+    for i, (row, previous_row) in enumerate(zip(rows, previous_rows)):
+        if row != previous_row:
+            output.append(_cursor_down(i))
+            output.append(row)
+    output.append(_cursor_down(len(rows) - 1))
+    return output
+
+
+def _cursor_down(rows: int) -> bytes:
+    """Restore the saved cursor position and move the cursor down by the given rows."""
+    # A count of 0 is taken as 1 by terminals, so moving down by 0 rows must be left out
+    return b"\033[u\033[%dB" % rows if rows else b"\033[u"
 
 
-def setup_terminal(lines_buffer: int) -> None:
+def setup_terminal(lines_buffer: int) -> bool:
+    """Make room for output of the given number of lines and save the cursor position at
+    its top left, so that it can be redrawn in place.
 
+    Returns:
+        Whether the output fits in the terminal, in which case the cursor position was
+        saved. Output that doesn't fit scrolls the terminal as it's written, so parts of it
+        drawn earlier won't stay where they were.
+    """
     terminal_width, terminal_height = get_terminal_size()
     if lines_buffer > terminal_height:
         # No need to scroll if the buffer is larger than the terminal anyway
-        return
+        return False
 
     # Scroll down enough that the video will be displayed entirely
     scroll_down(lines_buffer)
@@ -54,6 +277,14 @@ def setup_terminal(lines_buffer: int) -> None:
         sys.stdout.write("\033[u\033[?25h" + "\n" * lines_buffer)
 
     atexit.register(teardown)
+    return True
+
+
+# Matches the description of a video stream in ffmpeg's output, e.g.
+#   Stream #0:0[0x1](eng): Video: h264 ... 3840x2160, 9279 kb/s, 29.97 fps, 29.97 tbr, ...
+_RE_FFMPEG_VIDEO_INFO = re.compile(
+    rb"Stream .*Video:.* (?P<width>\d+)x(?P<height>\d+)\D.* (?P<fps>\d+(?:\.\d+)?) fps"
+)
 
 
 async def create_ffmpeg_process(
@@ -62,7 +293,10 @@ async def create_ffmpeg_process(
     width: int | None = None,
     height: int | None = None,
     keep_ratio: bool = True,
-) -> tuple[Process, int, int, float]:
+    monochrome: bool = False,
+    dither: bool = True,
+    ordered_dither: bool = False,
+) -> tuple[Process, BinaryIO, int, int, float, str]:
     """Create an ffmpeg subprocess.
 
     If width and height are not specified, the video will be decoded at its original
@@ -78,22 +312,37 @@ async def create_ffmpeg_process(
         width: The desired width of the video after rescaling. Defaults to None.
         height: The desired height of the video after rescaling. Defaults to None.
         keep_ratio: Whether to keep the aspect ratio when rescaling. Defaults to True.
+        monochrome: Whether to have ffmpeg do all the work for monochrome output, writing
+            edge enhanced 1-bit frames which `Canvas.from_bytes` loads as they are.
+            Defaults to False.
+        dither: Whether to dither monochrome output rather than thresholding it. Defaults
+            to True.
+        ordered_dither: Whether to dither monochrome output with an ordered pattern rather
+            than with error diffusion. Defaults to False.
 
     Returns:
-        A tuple containing the ffmpeg subprocess, the video width, the video height,
-        and the video fps.
+        A tuple containing the ffmpeg subprocess, the read end of the pipe it writes raw
+        frames to, the video width, the video height, the video fps, and the pixel format
+        of the frames, to be passed on to `extract_frames_from_video`. Frames are "monob"
+        for monochrome output, and otherwise "yuv420p", which takes half the bytes of
+        "rgb24" and has the luma plane first.
     """
 
+    pix_fmt = "monob" if monochrome else "yuv420p"
+
+    # Monochrome output ends up with 1 bit per pixel, so the cheapest scaling will do
+    scale_flags = ":flags=area" if monochrome else ""
+
     vf = []
     if width and height:
         if keep_ratio:
-            vf.append(f"scale={width}:{height}:force_original_aspect_ratio=decrease")
+            vf.append(f"scale={width}:{height}:force_original_aspect_ratio=decrease{scale_flags}")
         else:
-            vf.append(f"scale={width}:{height}")
+            vf.append(f"scale={width}:{height}{scale_flags}")
     elif width:
-        vf.append(f"scale={width}:-1")
+        vf.append(f"scale={width}:-1{scale_flags}")
     elif height:
-        vf.append(f"scale=-1:{height}")
+        vf.append(f"scale=-1:{height}{scale_flags}")
 
     if fps:
         vf.append(f"fps=fps={fps}")
@@ -101,78 +350,231 @@ async def create_ffmpeg_process(
     # Adjust gamma to make the image brighter
     vf.append("eq=gamma=1.5")
 
-    vf_str = ",".join(vf)
+    # Output full range BT.601 YUV, which is what PIL expects when converting from YCbCr,
+    # whatever color matrix the input's metadata asks for
+    vf.append("scale=out_range=pc:out_color_matrix=bt601")
 
-    process = await asyncio.create_subprocess_exec(
-        "ffmpeg",
-        "-i",
-        video_file,
-        "-vf",
-        vf_str,
-        "-pix_fmt",
-        "rgb24",
-        "-f",
-        "rawvideo",
-        "-",
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE,
-    )
+    if monochrome:
+        # The same as PIL's EDGE_ENHANCE_MORE filter, applied to the luma plane
+        vf.append("convolution=0m=-1 -1 -1 -1 9 -1 -1 -1 -1")
+        if not dither:
+            # Converting pure black and white to monob leaves nothing for dithering to do
+            vf.append("lutyuv=y='if(gte(val,128),255,0)'")
+        else:
+            # Have the conversion to monob done by a scaler with the chosen dithering
+            vf.append(f"scale=sws_dither={'bayer' if ordered_dither else 'ed'}")
+            vf.append("format=monob")
 
-    # Parse width, height, and fps from stderr
-    # Example lines:
-    #   Stream #0:0[0x1](eng): Video: h264 ... 3840x2160, 9279 kb/s, 29.97 fps, 29.97 tbr, ...
-    re_info = re.compile(
-        r"Stream .*Video:.* (?P<width>\d+)x(?P<height>\d+)\D.* (?P<fps>\d+(?:\.\d+)?) fps"
-    )
+    vf_str = ",".join(vf)
+
+    # Frames are written to a pipe of our own, so that `extract_frames_from_video` can
+    # read them with a `_FrameProtocol` rather than through a StreamReader
+    read_fd, write_fd = os.pipe()
+    _grow_pipe(read_fd)
+    try:
+        process = await asyncio.create_subprocess_exec(
+            "ffmpeg",
+            "-i",
+            video_file,
+            "-vf",
+            vf_str,
+            "-pix_fmt",
+            pix_fmt,
+            "-f",
+            "rawvideo",
+            "-",
+            stdout=write_fd,
+            stderr=asyncio.subprocess.PIPE,
+        )
+    except BaseException:
+        os.close(read_fd)
+        raise
+    finally:
+        os.close(write_fd)
+    frames_pipe = os.fdopen(read_fd, "rb", buffering=0)
+
+    # Parse width, height, and fps from stderr. Lines are matched as they are, without
+    # decoding them, and only once the output streams are being described
     is_output = False
     async for line in process.stderr:
         if line.startswith(b"Output"):
             is_output = True
 
-        if is_output and (match := re_info.search(line.decode("utf-8"))):
+        if is_output and (match := _RE_FFMPEG_VIDEO_INFO.search(line)):
             width = int(match["width"])
             height = int(match["height"])
             fps = float(match["fps"])
-            return process, width, height, fps
+            return process, frames_pipe, width, height, fps, pix_fmt
 
+    frames_pipe.close()
     raise InvalidVideoError("Could not parse video info from ffmpeg stderr")
 
 
+def _grow_pipe(fd: int) -> None:
+    """Grow the pipe ffmpeg writes frames to, so that each read gets more data at once.
+
+    The default pipe size is 64 KiB, which takes dozens of reads per frame for larger
+    videos. This is only possible on Linux, and is skipped elsewhere.
+    """
+    set_pipe_size = getattr(fcntl, "F_SETPIPE_SZ", None)
+    if set_pipe_size is None:
+        return
+
+    try:
+        fcntl.fcntl(fd, set_pipe_size, _PIPE_BUFFER_SIZE)
+    except OSError:
+        # The size may be above the system's limit, in which case the default is kept
+        pass
+
+
+class _FrameProtocol(asyncio.Protocol):
+    """Splits the raw video stream from ffmpeg into frames as it arrives.
+
+    Incoming data is copied once, straight into the memory of the frame it belongs to.
+    A StreamReader would copy it into its buffer, and then again out of it for each frame.
+    Consecutive frames are laid out back to back in slabs of `frames_per_slab` frames,
+    which takes one allocation per slab rather than one per frame. Frames aren't
+    recycled, as they're shared with the images made from them - a slab is freed once
+    none of its frames are in use. Reading is paused while `max_frames` complete frames
+    are waiting to be taken.
+
+    Args:
+        bytes_per_frame: The size of each raw frame.
+        max_frames: How many complete frames to hold before pausing reading.
+        frames_per_slab: How many frames to allocate memory for at once.
+    """
+
+    def __init__(self, bytes_per_frame: int, max_frames: int, frames_per_slab: int = 8) -> None:
+        self._bytes_per_frame = bytes_per_frame
+        self._max_frames = max_frames
+        self._slab_size = bytes_per_frame * frames_per_slab
+        self._slab = memoryview(bytearray(self._slab_size))
+        self._frame_start = 0
+        self._filled = 0
+        self._frames = deque()
+        self._ready = asyncio.Event()
+        self._transport = None
+        self._paused = False
+        self._eof = False
+
+    def connection_made(self, transport: asyncio.ReadTransport) -> None:
+        self._transport = transport
+
+    def data_received(self, data: bytes) -> None:
+        data = memoryview(data)
+        while data:
+            size = min(len(data), self._bytes_per_frame - self._filled)
+            offset = self._frame_start + self._filled
+            self._slab[offset : offset + size] = data[:size]
+            self._filled += size
+            data = data[size:]
+            if self._filled == self._bytes_per_frame:
+                frame_end = self._frame_start + self._bytes_per_frame
+                self._frames.append(self._slab[self._frame_start : frame_end])
+                self._filled = 0
+                if frame_end < self._slab_size:
+                    self._frame_start = frame_end
+                else:
+                    self._slab = memoryview(bytearray(self._slab_size))
+                    self._frame_start = 0
+
+        if self._frames:
+            self._ready.set()
+            if len(self._frames) >= self._max_frames and not self._paused:
+                self._paused = True
+                self._transport.pause_reading()
+
+    def connection_lost(self, exc: Exception | None) -> None:
+        # A truncated last frame, if any, is dropped
+        self._eof = True
+        self._ready.set()
+
+    async def get_frame(self) -> memoryview | None:
+        """Get the next frame, or None once the stream has ended."""
+        while not self._frames:
+            if self._eof:
+                return None
+            self._ready.clear()
+            await self._ready.wait()
+
+        if self._paused and len(self._frames) <= self._max_frames:
+            self._paused = False
+            self._transport.resume_reading()
+        return self._frames.popleft()
+
+    def close(self) -> None:
+        if self._transport is not None:
+            self._transport.close()
+
+
 async def extract_frames_from_video(
     process: Process,
+    frames_pipe: BinaryIO,
     width: int,
     height: int,
+    color: bool = True,
     return_pil_images: bool = True,
-) -> AsyncIterator[Image] | AsyncIterator[bytes]:
+    pix_fmt: str = "yuv420p",
+) -> AsyncIterator[Image] | AsyncIterator[memoryview]:
     """Extract frames from a video file.
 
     Extracts frames from a video by wrapping ffmpeg in an asyncio subprocess. The
-    frames are decoded as raw RGB data and then converted to a PIL Image.
-    Optionally rescales or resizes the video to specific dimensions via an ffmpeg filter.
+    frames are decoded as raw YUV 4:2:0 data (see `create_ffmpeg_process`) and then
+    converted to a PIL Image. Monochrome output only needs the luma plane, so in that
+    case the chroma planes are skipped and a grayscale image is returned. Frames in the
+    "monob" pixel format are returned as "1" mode images.
 
     Args:
-        process: The ffmpeg subprocess.
+        process: The ffmpeg subprocess, as created by `create_ffmpeg_process`.
+        frames_pipe: The read end of the pipe the subprocess writes frames to, as returned
+            by `create_ffmpeg_process`.
         width: The desired width of the video after rescaling. Defaults to None.
         height: The desired height of the video after rescaling. Defaults to None.
-        return_pil_images: Whether to return PIL Images or raw bytes. Defaults to True.
+        color: Whether to return RGB images rather than grayscale ones. Defaults to True.
+        return_pil_images: Whether to return PIL Images or raw frame data. Defaults to True.
+        pix_fmt: The pixel format ffmpeg is writing, as returned by `create_ffmpeg_process`.
+            Defaults to "yuv420p".
 
     Returns:
-        An async iterator of PIL images, or raw bytes if pil_images is False.
+        An async iterator of PIL images, or memoryviews of the raw frame data if
+        return_pil_images is False.
     """
-    bytes_per_frame = 3 * width * height
-    buf = bytearray()
-    while True:
-        chunk = await process.stdout.read(bytes_per_frame)
-        if not chunk:
-            break
-        buf.extend(chunk)
-        if len(buf) >= bytes_per_frame:
-            bs = bytes(buf[:bytes_per_frame])
-            buf = buf[bytes_per_frame:]
-            if return_pil_images:
-                yield PIL.Image.frombytes("RGB", (width, height), bs)
-            else:
+    luma_size = width * height
+    chroma_width, chroma_height = (width + 1) // 2, (height + 1) // 2
+    chroma_size = chroma_width * chroma_height
+    if pix_fmt == "monob":
+        # 8 pixels per byte, with each row padded to a whole byte
+        bytes_per_frame = (width + 7) // 8 * height
+    else:
+        bytes_per_frame = luma_size + 2 * chroma_size
+    loop = asyncio.get_running_loop()
+    _, protocol = await loop.connect_read_pipe(
+        lambda: _FrameProtocol(bytes_per_frame, max_frames=4), frames_pipe
+    )
+    try:
+        while (bs := await protocol.get_frame()) is not None:
+            if not return_pil_images:
                 yield bs
+                continue
+
+            if pix_fmt == "monob":
+                yield PIL.Image.frombuffer("1", (width, height), bs, "raw", "1", 0, 1)
+                continue
+
+            y = PIL.Image.frombuffer("L", (width, height), bs[:luma_size], "raw", "L", 0, 1)
+            if not color:
+                yield y
+                continue
+
+            u, v = (
+                PIL.Image.frombuffer(
+                    "L", (chroma_width, chroma_height), plane, "raw", "L", 0, 1
+                ).resize((width, height))
+                for plane in (bs[luma_size:-chroma_size], bs[-chroma_size:])
+            )
+            yield PIL.Image.merge("YCbCr", (y, u, v)).convert("RGB")
+    finally:
+        protocol.close()
 
     await process.wait()
 
@@ -183,6 +585,9 @@ def image_to_braille(
     keep_ratio: bool = True,
     color: bool = False,
     invert: bool = False,
+    dither: bool = True,
+    palette: bool = False,
+    ordered_dither: bool = False,
 ) -> str:
     """Helper function for the CLI tool to display an image in either color or monochrome.
 
@@ -192,72 +597,155 @@ def image_to_braille(
         keep_ratio: Whether to keep the aspect ratio when rescaling. Defaults to True.
         color: Whether to display the image in color. Defaults to False.
         invert: Whether to invert the image. Defaults to False.
+        dither: Whether to dither monochrome images rather than thresholding them.
+            Defaults to True.
+        palette: Whether to use the 256 color ANSI palette rather than 24-bit color, which
+            makes for much less output. Defaults to False.
+        ordered_dither: Whether to dither monochrome images with an ordered pattern rather
+            than with error diffusion, which is faster and flickers less in videos. Defaults
+            to False.
 
     Returns:
         A string containing the braille representation of the image.
     """
-    image = image.convert("RGB")
+    # Monochrome output only depends on luminance
+    image = image.convert("RGB" if color else "L")
     if resize is not None:
+        resample = _resampling_filter(image, resize, color)
         if keep_ratio:
-            # PIL.Image.thumbnail() will resize the image to fit within the given dimensions
-            # while maintaining the aspect ratio. It will also modify the image in place, so
-            # we need to make a copy first.
-            image = image.copy()
-            image.thumbnail(resize)
+            # Resize the image just like PIL.Image.thumbnail() would. That modifies the image
+            # in place though, so it would need a copy of the image to work on first, whereas
+            # PIL.Image.resize() creates the new image directly.
+            size = _thumbnail_size(image, resize)
+            if size != image.size:
+                image = image.resize(size, resample, reducing_gap=2.0)
         else:
             # PIL.Image.resize() will resize the image to the given dimensions, ignoring the
             # aspect ratio. It will create a new image, so we don't need to make a copy.
-            image = image.resize(resize)
+            image = image.resize(resize, resample)
 
     if color:
         # return _canvas_image_color_with_bg(image)
-        return _canvas_image_color_bg(image, invert)
+        return _canvas_image_color_bg(image, invert, palette)
     else:
-        return _canvas_image_monochrome(image, invert)
+        return _canvas_image_monochrome(image, invert, dither, ordered_dither)
+
+
+def _thumbnail_size(image: Image, size: tuple[int, int]) -> tuple[int, int]:
+    """Get the size PIL.Image.thumbnail() would resize an image to, so that it fits within
+    the given size while keeping its aspect ratio. Images are only ever shrunk."""
+    width, height = size
+    if width >= image.width and height >= image.height:
+        return image.size
+
+    aspect = image.width / image.height
+    if width / height >= aspect:
+        candidates = (math.floor(height * aspect), math.ceil(height * aspect))
+        width = max(min(candidates, key=lambda n: abs(aspect - n / height)), 1)
+    else:
+        candidates = (math.floor(width / aspect), math.ceil(width / aspect))
+        height = max(min(candidates, key=lambda n: n and abs(aspect - width / n)), 1)
+    return width, height
+
+
+def _resampling_filter(image: Image, size: tuple[int, int], color: bool) -> Resampling:
+    """Choose the cheapest resampling filter that doesn't visibly change the result.
+
+    Monochrome images end up as 1 bit per dot, which hides the difference between filters,
+    and when shrinking by 2x or more a box filter averages every source pixel anyway.
+    """
+    if not color or image.width >= 2 * size[0] or image.height >= 2 * size[1]:
+        return Resampling.BOX
+    return Resampling.BILINEAR
+
 
+@lru_cache(maxsize=4)
+def _ordered_dither_thresholds(size: tuple[int, int]) -> Image:
+    """Get a grayscale image of the given size tiled with the ordered dithering thresholds.
 
-def _canvas_image_monochrome(image: Image, invert: bool = False) -> str:
-    """Draw an image as monochrome to a canvas and return the result as a string."""
-    image_dithered = image.filter(ImageFilter.EDGE_ENHANCE_MORE)
-    image_dithered = image_dithered.convert("1", dither=Dither.FLOYDSTEINBERG)
-    canvas = Canvas(image_dithered.width, image_dithered.height)
-    canvas.draw_image(image_dithered)
+    Frames of a video all have the same size, so the image is only built once for them.
+    """
+    width, height = size
+    rows = [(row * (width // len(row) + 1))[:width] for row in _BAYER_THRESHOLDS]
+    return PIL.Image.frombytes("L", size, b"".join(rows[y % len(rows)] for y in range(height)))
+
+
+def packed_pixels_to_braille(
+    data: bytes, width: int, height: int, invert: bool = False
+) -> bytearray:
+    """Convert 1-bit pixels to UTF-8 encoded braille, without going through a canvas.
+
+    Args:
+        data: The pixels, packed 8 per byte with each row padded to a whole number of bytes,
+            as in Pillow's "1" mode images and ffmpeg's "monob" frames.
+        width: The width of the pixels.
+        height: The height of the pixels.
+        invert: Whether to flip every dot. Defaults to False.
+
+    Returns:
+        The encoded braille characters, row after row with nothing in between rows.
+    """
+    cells = pack_braille_cells(data, width, height)
     if invert:
-        canvas.invert()
+        cells = cells.translate(_INVERTED_CELLS)
+    return braille_bytes_to_utf8(cells)
+
 
-    return canvas.get_str()
+def _canvas_image_monochrome(
+    image: Image, invert: bool = False, dither: bool = True, ordered_dither: bool = False
+) -> str:
+    """Draw an image as monochrome braille and return the result as a string."""
+    image_edges = image.filter(ImageFilter.EDGE_ENHANCE_MORE)
+    if dither and ordered_dither:
+        # Pixels above their threshold are left with a nonzero value, and the others with 0
+        thresholds = _ordered_dither_thresholds(image_edges.size)
+        image_mono = ImageChops.subtract(image_edges, thresholds).point(_NONZERO_LUT, "1")
+    elif dither:
+        image_mono = image_edges.convert("1", dither=Dither.FLOYDSTEINBERG)
+    else:
+        image_mono = image_edges.point(_THRESHOLD_LUT, "1")
+
+    # The 1-bit pixels are packed into braille characters as they are, rather than being
+    # unpacked into a canvas first
+    chars = packed_pixels_to_braille(image_mono.tobytes(), *image_mono.size, invert).decode()
+    row_width = math.ceil(image_mono.width / BRAILLE_COLS)
+    return "\n".join(chars[i : i + row_width] for i in range(0, len(chars), row_width))
 
 
 def _canvas_image_color_with_bg(image: Image, invert: bool = False) -> str:
     """Draw an image as color to a canvas and return the result as a string."""
     image_bg = image.reduce((BRAILLE_COLS, BRAILLE_ROWS))
     canvas = Canvas(image.width, image.height).draw_image(
-        image.filter(ImageFilter.EDGE_ENHANCE_MORE).filter(ImageFilter.EDGE_ENHANCE_MORE)
+        image.filter(ImageFilter.EDGE_ENHANCE_MORE)
     )
     if invert:
         canvas.invert()
 
-    result_text = str(canvas)
-    chars = []
-    for y, line in enumerate(result_text.splitlines(keepends=False)):
-        for x, ch in enumerate(line):
-            if x >= image_bg.width or y >= image_bg.height:
-                bg_r, bg_g, bg_b = (0, 0, 0)
-            else:
-                bg_r, bg_g, bg_b = image_bg.getpixel((x, y))
-
-            if x >= image.width * BRAILLE_ROWS or y >= image_bg.height * BRAILLE_COLS:
-                fg_r, fg_g, fg_b = (0, 0, 0)
-            else:
-                fg_r, fg_g, fg_b = image.getpixel((x * BRAILLE_COLS, y * BRAILLE_ROWS))
-
-            code_bg = f"48;2;{bg_r};{bg_g};{bg_b}"
-            code_fg = f"38;2;{fg_r};{fg_g};{fg_b}"
-            chars.append(f"\033[{code_bg};{code_fg}m{ch}")
-        # Reset style and add a newline
-        chars.append("\033[0m\n")
-
-    return "".join(chars).rstrip()
+    # The foreground color of each cell is the color of its top left pixel. Pixels are
+    # taken straight from the images' raw bytes rather than with a getpixel() call each
+    fg = image.tobytes()
+    bg = image_bg.tobytes()
+    fg_row_size = 3 * image.width * BRAILLE_ROWS
+    bg_row_size = 3 * image_bg.width
+    fg_step = 3 * BRAILLE_COLS
+
+    rows = []
+    for y, line in enumerate(canvas.get_rows()):
+        fg_row = fg[y * fg_row_size : y * fg_row_size + 3 * image.width]
+        bg_row = bg[y * bg_row_size : (y + 1) * bg_row_size]
+        colors = zip(
+            fg_row[0::fg_step],
+            fg_row[1::fg_step],
+            fg_row[2::fg_step],
+            bg_row[0::3],
+            bg_row[1::3],
+            bg_row[2::3],
+        )
+        # Each row is joined in one go, ending with a style reset
+        codes = map(_TRUECOLOR_SGR.__mod__, colors)
+        rows.append("".join(chain.from_iterable(zip(codes, line))) + "\033[0m")
+
+    return "\n".join(rows)
 
 
 def _canvas_image_color_no_bg(image: Image) -> str:
@@ -268,59 +756,74 @@ def _canvas_image_color_no_bg(image: Image) -> str:
 
     image_color = image.reduce((BRAILLE_COLS, BRAILLE_ROWS))
     image = image.filter(ImageFilter.EDGE_ENHANCE_MORE)
-    cell_colors = list(image_color.getdata())
+    # The escape sequences are put together straight from the image's raw bytes, rather
+    # than from a tuple per pixel
+    fg = image_color.tobytes()
+    d = _DECIMALS
+    cell_codes = [
+        f"\033[38;2;{d[r]};{d[g]};{d[b]}m" for r, g, b in zip(fg[0::3], fg[1::3], fg[2::3])
+    ]
 
     canvas = Canvas(image.width, image.height)
     canvas.draw_image(image)
-    result_text = canvas.get_str()
 
     chars = []
-    color_lines = [
-        cell_colors[i : (i + math.ceil(image.width / BRAILLE_COLS))]
-        for i in range(0, len(cell_colors), math.ceil(image.width / BRAILLE_COLS))
-    ]
-    for line, color_line in zip(result_text.splitlines(keepends=False), color_lines):
-        for ch, color in zip(line, color_line):
-            r, g, b = color
-            code = f"38;2;{r};{g};{b}"
-            chars.append(f"\033[{code}m{ch}")
+    row_width = math.ceil(image.width / BRAILLE_COLS)
+    color_lines = [cell_codes[i : i + row_width] for i in range(0, len(cell_codes), row_width)]
+    for line, color_line in zip(canvas.get_rows(), color_lines):
+        for ch, code in zip(line, color_line):
+            chars.append(f"{code}{ch}")
         # Reset style and add a newline
         chars.append("\033[0m\n")
 
     return "".join(chars).rstrip()
 
 
-def _canvas_image_color_bg(image: Image, invert) -> str:
+def _palette_indices(image: Image) -> bytes:
+    """Get the index of the closest color of the 256 color palette for each pixel of an
+    RGB image."""
+    r, g, b = image.point(_CUBE_INDEX_LUT).split()
+    return ImageChops.add(ImageChops.add(r, g), b).tobytes()
+
+
+def _canvas_image_color_bg(image: Image, invert, palette: bool = False) -> str:
     """Draw an image as color to a canvas and return the result as a string."""
 
     image_color = image.reduce((BRAILLE_COLS, BRAILLE_ROWS))
+    if palette:
+        # Snapping colors to the palette up front makes for longer runs of the same color
+        image_color = image_color.point(_CUBE_LEVEL_LUT * 3)
+    # Desaturated and darkened color for bg
+    image_bg = image_color.point(_DARKEN_LUT * 3)
     image = image.filter(ImageFilter.EDGE_ENHANCE_MORE)
-    # Lighten the image
-    cell_colors = list(image_color.getdata())
 
     canvas = Canvas(image.width, image.height)
     canvas.draw_image(image)
     if invert:
         canvas.invert()
-    result_text = canvas.get_str()
+    cells = canvas.get_str(sep="")
 
-    chars = []
-    color_lines = [
-        cell_colors[i : (i + math.ceil(image.width / BRAILLE_COLS))]
-        for i in range(0, len(cell_colors), math.ceil(image.width / BRAILLE_COLS))
-    ]
-    for line, color_line in zip(result_text.splitlines(keepends=False), color_lines):
-        for ch, color in zip(line, color_line):
-            r, g, b = color
-
-            # Desaturated and darkened color for bg
-            r_bg = int(r * 0.3)
-            g_bg = int(g * 0.3)
-            b_bg = int(b * 0.3)
-            code_bg = f"48;2;{r_bg};{g_bg};{b_bg}"
-            code = f"38;2;{r};{g};{b}"
-            chars.append(f"\033[{code};{code_bg}m{ch}")
-        # Reset style and add a newline
-        chars.append("\033[0m\n")
-
-    return "".join(chars).rstrip()
+    # The escape sequences of all cells are looked up or put together straight from the
+    # images' raw bytes
+    if palette:
+        colors = zip(_palette_indices(image_color), _palette_indices(image_bg))
+        codes = list(map(_palette_escape_codes.__getitem__, colors))
+    else:
+        fg = image_color.tobytes()
+        bg = image_bg.tobytes()
+        colors = zip(fg[0::3], fg[1::3], fg[2::3], bg[0::3], bg[1::3], bg[2::3])
+        d = _DECIMALS
+        codes = [
+            f"\033[38;2;{d[r]};{d[g]};{d[b]};48;2;{d[bg_r]};{d[bg_g]};{d[bg_b]}m"
+            for r, g, b, bg_r, bg_g, bg_b in colors
+        ]
+
+    # Runs of cells with the same color only need the escape sequence once, except that
+    # every row after the first starts by resetting the style of the previous one and
+    # moving on to a new line
+    prefixes = [code if code != previous else "" for code, previous in zip(codes, ["", *codes])]
+    row_width = image_color.width
+    for start in range(row_width, len(codes), row_width):
+        prefixes[start] = "\033[0m\n" + codes[start]
+
+    return "".join(chain.from_iterable(zip(prefixes, cells))) + "\033[0m"
@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import itertools
 import math
 from typing import Iterable, Literal
 
@@ -12,6 +11,15 @@ from brailliant import (
 
 INV_LOG1P_1 = 1 / math.log1p(1)
 
+# The dots of the left and right columns of a character for each level from 0 to 4, with
+# and without filling. Levels are looked up directly, rather than as (x, y) coordinates
+_LEVEL_DOTS = {
+    filled: tuple(
+        {level: mapping[(x, level - 1)] if level else 0 for level in range(5)} for x in range(2)
+    )
+    for filled, mapping in ((False, coords_braille_mapping), (True, coords_braille_mapping_filled))
+}
+
 
 def sparkline_non_normalized(
     data: Iterable[int],
@@ -53,22 +61,21 @@ def sparkline_non_normalized(
         if math.ceil(len(data) / 2) > width:
             data = data[-width * 2 :]
 
-    mapping = coords_braille_mapping_filled if filled else coords_braille_mapping
+    left_dots, right_dots = _LEVEL_DOTS[filled]
 
-    # Here, we'll use the mapping to convert the columns of braille dots into
-    # braille characters. We zip them with a 1-element offset so that we can
-    # get the one character that represents the two columns.
-    evens = [mapping.setdefault((0, left - 1), 0) for left in data[::2]]
-    odds = [mapping.setdefault((1, right - 1), 0) for right in data[1::2]]
-    chars = [
-        braille_table_str[left | right]
-        for left, right in itertools.zip_longest(evens, odds, fillvalue=0)
-    ]
+    # Here, we'll use the level tables to convert the columns of braille dots into
+    # braille characters. The left and right columns of every character are ORed
+    # together all at once, as big integers, and the characters are then looked up
+    # with a single translate. Levels out of range have no dots.
+    evens = bytes([left_dots.get(left, 0) for left in data[::2]])
+    odds = bytes([right_dots.get(right, 0) for right in data[1::2]]).ljust(len(evens), b"\0")
+    cells = int.from_bytes(evens, "big") | int.from_bytes(odds, "big")
+    chars = cells.to_bytes(len(evens), "big").decode("latin-1").translate(braille_table_str)
 
     if width is not None and len(chars) < width:
-        chars.extend(braille_table_str[0] * (width - len(chars)))
+        chars += braille_table_str[0] * (width - len(chars))
 
-    return "".join(chars)
+    return chars
 
 
 def sparkline(
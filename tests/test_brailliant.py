@@ -1,10 +1,12 @@
 from __future__ import annotations
 
+import asyncio
+import io
 import textwrap
 
 import pytest
 
-from brailliant import coords_to_braille, sparkline
+from brailliant import braille_bytes_to_utf8, coords_to_braille, pack_braille_cells, sparkline
 from brailliant.canvas import Canvas
 
 
@@ -147,3 +149,162 @@ def test_canvas():
         """
         ).strip()
     )
+
+
+def test_canvas_control_chars():
+    canvas = Canvas(4, 8)
+    canvas.draw_line(0, 0, 3, 7)
+
+    assert canvas.get_str_control_chars() == canvas.get_str().replace("\n", "\x1b[1B\r")
+    assert canvas.get_str(sep="|") == canvas.get_str().replace("\n", "|")
+
+
+def test_canvas_write_to():
+    canvas = Canvas(40, 40)
+    canvas.draw_circle(15, 15, 10, False)
+
+    stream = io.BytesIO()
+    canvas.write_to(stream)
+    assert stream.getvalue() == canvas.get_str_control_chars().encode()
+    assert canvas.get_rows() == canvas.get_str().split("\n")
+    assert canvas.get_rows_utf8() == canvas.get_str().encode().split(b"\n")
+
+
+def test_canvas_draw_image():
+    Image = pytest.importorskip("PIL.Image")
+
+    # Left half white, right half black, with a width that isn't a multiple of 8
+    image = Image.new("1", (10, 4))
+    image.paste(1, (0, 0, 6, 4))
+
+    canvas = Canvas(10, 4).draw_image(image, dither=False)
+    assert canvas.get_str() == "⣿⣿⣿⠀⠀"
+
+
+def test_canvas_from_image():
+    Image = pytest.importorskip("PIL.Image")
+
+    image = Image.new("L", (5, 3), color=255)
+    canvas = Canvas.from_image(image, dither=False)
+
+    # The size is rounded up to whole characters, and the extra dots are left empty
+    assert (canvas.width, canvas.height) == (6, 4)
+    assert canvas.get_str() == "⠿⠿⠇"
+
+
+def test_canvas_from_bytes():
+    # Rows of 3 pixels, each padded to a whole byte
+    canvas = Canvas.from_bytes(bytes([0b10100000, 0b01000000]), 3, 2)
+
+    assert (canvas.width, canvas.height) == (4, 4)
+    assert canvas.get_str() == "⠑⠁"
+
+
+def test_pack_braille_cells():
+    # Rows of 3 pixels, each padded to a whole byte with bits that should be ignored
+    data = bytes([0b10111111, 0b01011111])
+
+    assert braille_bytes_to_utf8(pack_braille_cells(data, 3, 2)).decode() == "⠑⠁"
+    assert pack_braille_cells(data, 3, 2) == bytes([0b10010000, 0b10000000])
+
+
+def test_changed_rows():
+    cli_utils = pytest.importorskip("brailliant.cli_utils")
+
+    rows = [b"ab", b"cd", b"ef"]
+
+    # Only changed rows are rewritten, and the cursor is left on the last row
+    assert cli_utils.changed_rows(rows, [b"ab", b"xx", b"ef"]) == [
+        b"\033[u\033[1B",
+        b"cd",
+        b"\033[u\033[2B",
+    ]
+    # Moving down by 0 rows would move down by 1, so the move is left out for the first row
+    assert cli_utils.changed_rows(rows, [b"xx", b"cd", b"ef"]) == [
+        b"\033[u",
+        b"ab",
+        b"\033[u\033[2B",
+    ]
+    assert cli_utils.changed_rows([b"ab"], [b"ab"]) == [b"\033[u"]
+    # Frames of a different size are written in full
+    assert cli_utils.changed_rows(rows, []) == [b"ab\ncd\nef"]
+
+
+def test_frame_ring():
+    cli_utils = pytest.importorskip("brailliant.cli_utils")
+
+    async def main():
+        ring = cli_utils.FrameRing(capacity=2)
+        await ring.put(1)
+        await ring.put(2)
+
+        # A full ring holds off new frames until one is taken
+        put = asyncio.ensure_future(ring.put(3))
+        await asyncio.sleep(0)
+        assert not put.done() and len(ring) == 2
+
+        assert await ring.get() == 1
+        await put
+        assert [await ring.get(), await ring.get()] == [2, 3]
+
+    asyncio.run(main())
+
+
+class _FakeTransport:
+    def __init__(self):
+        self.paused = False
+
+    def pause_reading(self):
+        self.paused = True
+
+    def resume_reading(self):
+        self.paused = False
+
+
+def test_frame_protocol():
+    cli_utils = pytest.importorskip("brailliant.cli_utils")
+
+    async def main():
+        protocol = cli_utils._FrameProtocol(3, max_frames=2, frames_per_slab=2)
+        transport = _FakeTransport()
+        protocol.connection_made(transport)
+
+        # Frames split across chunks are put back together, also across slabs
+        protocol.data_received(b"ab")
+        protocol.data_received(b"cd")
+        assert not transport.paused
+        protocol.data_received(b"efghij")
+        assert transport.paused
+
+        assert await protocol.get_frame() == b"abc"
+        assert transport.paused
+        assert await protocol.get_frame() == b"def"
+        assert not transport.paused
+
+        # A truncated last frame is dropped
+        protocol.connection_lost(None)
+        assert await protocol.get_frame() == b"ghi"
+        assert await protocol.get_frame() is None
+
+    asyncio.run(main())
+
+
+def test_image_to_braille_palette():
+    Image = pytest.importorskip("PIL.Image")
+    cli_utils = pytest.importorskip("brailliant.cli_utils")
+
+    # Colors are snapped to the palette, and each row sets them once for its run of cells
+    image = Image.new("RGB", (4, 8), (250, 10, 0))
+    assert cli_utils.image_to_braille(image, color=True, palette=True) == (
+        "\033[38;5;196;48;5;52m⡐⠅\033[0m\n\033[38;5;196;48;5;52m⡐⢅\033[0m"
+    )
+
+
+def test_image_to_braille_ordered_dither():
+    Image = pytest.importorskip("PIL.Image")
+    cli_utils = pytest.importorskip("brailliant.cli_utils")
+
+    # Mid gray comes out as a checkerboard, where thresholding would make it all white
+    image = Image.new("L", (8, 8), 128)
+    assert cli_utils.image_to_braille(image, ordered_dither=True) == "⢕⢕⢕⢕\n⢕⢕⢕⢕"
+    assert cli_utils.image_to_braille(image, dither=False) == "⣿⣿⣿⣿\n⣿⣿⣿⣿"